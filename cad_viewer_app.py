@@ -330,18 +330,38 @@ def extract_geo_occ(step_path):
 
 
 def extract_geo(mesh_obj):
-    """Extract geometry from mesh object using trimesh."""
+    """Extract geometry from mesh object in one fused NumPy pass over the faces."""
     try:
         if hasattr(mesh_obj, 'geometry') and mesh_obj.geometry:
             meshes = [g for g in mesh_obj.geometry.values() if hasattr(g,'vertices')]
             if meshes: mesh_obj = trimesh.util.concatenate(meshes)
-        vol  = abs(mesh_obj.volume) if hasattr(mesh_obj,'volume') and mesh_obj.volume else 0
-        dims = mesh_obj.bounds[1] - mesh_obj.bounds[0]
-        euler = mesh_obj.euler_number
+        V = np.asarray(mesh_obj.vertices, dtype=np.float64)
+        F = np.asarray(mesh_obj.faces, dtype=np.int64)
+
+        # Area and signed-tetrahedron volume share one cross product per face
+        a, b, c = V[F[:,0]], V[F[:,1]], V[F[:,2]]
+        cross = np.cross(b - a, c - a)
+        norm  = np.linalg.norm(cross, axis=1)
+        area  = 0.5 * norm.sum()
+        vol   = abs(np.einsum('ij,ij->i', a, cross).sum() / 6.0)
+
+        # Hand the same cross products to trimesh as face normals, so
+        # detect_features() reads them from cache instead of recomputing
+        unit = np.zeros_like(cross)
+        np.divide(cross, norm[:,None], out=unit, where=norm[:,None] > 0)
+        mesh_obj.face_normals = unit
+
+        # Unique edges as packed (lo, hi) keys; closed mesh = every edge used twice
+        edges = np.sort(F[:, [0,1,1,2,2,0]].reshape(-1, 2), axis=1)
+        _, edge_uses = np.unique(edges[:,0] * len(V) + edges[:,1], return_counts=True)
+        watertight = len(F) > 0 and bool(np.all(edge_uses == 2))
+
+        mesh_faces = len(F)
+        mesh_edges = len(edge_uses)
+        mesh_verts = len(V)
+        euler = mesh_verts - mesh_edges + mesh_faces
         genus = max(0, 1 - euler//2)
-        mesh_faces = len(mesh_obj.faces)
-        mesh_edges = len(mesh_obj.edges_unique) if hasattr(mesh_obj,'edges_unique') else mesh_faces*3//2
-        mesh_verts = len(mesh_obj.vertices)
+        dims  = V.max(axis=0) - V.min(axis=0)
         return {
             'vertices':     mesh_verts,
             'faces':        mesh_faces,
@@ -350,11 +370,11 @@ def extract_geo(mesh_obj):
             'mesh_edges':   mesh_edges,
             'mesh_vertices':mesh_verts,
             'has_cad_topo': False,
-            'volume':   vol,
-            'area':     mesh_obj.area,
-            'watertight': mesh_obj.is_watertight or vol > 0,
+            'volume':   float(vol),
+            'area':     float(area),
+            'watertight': watertight or vol > 0,
             'dims':     {'x': float(dims[0]), 'y': float(dims[1]), 'z': float(dims[2])},
-            'bbox_vol': float(mesh_obj.bounding_box.volume),
+            'bbox_vol': float(np.prod(dims)),
             'holes':    int(genus),
             'source':   'trimesh',
             'accuracy': 'standard',
@@ -1128,11 +1148,17 @@ body{display:flex;align-items:center;justify-content:center;}
                                .replace('.stp','.stl').replace('.STP','.stl')
 
             prog.progress(60)
+            # Parsed once and shared by the GLB export and the analysis below.
+            # Default processing (vertex merge) stays on: the topology stats need it.
             mesh = trimesh.load(stlp)
             try:
-                clean = trimesh.Trimesh(vertices=mesh.vertices.copy(),
-                                        faces=mesh.faces.copy(), process=False)
-                clean.export(glbp, file_type='glb')
+                # Hand the GLB writer float32/uint32 buffers directly: no
+                # .copy() into a second Trimesh and no float64 re-encode on export.
+                # Unquantized: this GLB is downloaded and stored, so it stays exact.
+                from stl_to_glb_converter import write_glb
+                write_glb(np.ascontiguousarray(mesh.vertices, dtype=np.float32),
+                          np.ascontiguousarray(mesh.faces, dtype=np.uint32), glbp,
+                          quantize=False)
             except:
                 mesh.export(glbp, file_type='glb')
 
@@ -1149,10 +1175,9 @@ body{display:flex;align-items:center;justify-content:center;}
                 step_topo = extract_step_topology(inp)
 
             # Get mesh geometry from trimesh
-            mesh2 = trimesh.load(stlp)
             if geo is None:
-                geo      = extract_geo(mesh2)
-                features = detect_features(mesh2, geo)
+                geo      = extract_geo(mesh)
+                features = detect_features(mesh, geo)
 
             # Merge true CAD topology into geo (overrides mesh triangle counts)
             if step_topo and geo is not None:
@@ -1167,9 +1192,9 @@ body{display:flex;align-items:center;justify-content:center;}
                 geo['edge_types']   = step_topo['edge_types']
                 geo['holes']        = step_topo['holes']
                 # Keep mesh counts separately
-                geo['mesh_faces']    = len(mesh2.faces)
-                geo['mesh_edges']    = len(mesh2.edges_unique) if hasattr(mesh2,'edges_unique') else 0
-                geo['mesh_vertices'] = len(mesh2.vertices)
+                geo['mesh_faces']    = len(mesh.faces)
+                geo['mesh_edges']    = len(mesh.edges_unique) if hasattr(mesh,'edges_unique') else 0
+                geo['mesh_vertices'] = len(mesh.vertices)
                 # Update features from STEP topology
                 features = step_topo['features']
             with open(glbp,'rb') as fh: glb_bytes = fh.read()
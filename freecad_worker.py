@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+FreeCAD Worker
+Long-lived headless FreeCAD process used by step_to_glb_converter.py,
+so FreeCAD/OCCT start up once instead of once per STEP file.
+
+Reads one JSON request per line on stdin:
+    {"id": 1, "step": "in.step", "stl": "out.stl", "tolerance": 0.1}
+announces when it starts on one, and answers each with one line on
+stdout, echoing its id:
+    WORKER_REPLY {"started": 1}
+    WORKER_REPLY {"ok": true, "id": 1}
+Once FreeCAD is loaded it announces itself with WORKER_REPLY {"ready": true}.
+A failure to write the STL (e.g. tmpfs full) is flagged with "write_failed"
+so the caller can retry somewhere else.
+
+Usage: freecadcmd freecad_worker.py
+"""
+
+import sys
+import json
+
+import FreeCAD
+import Part
+import MeshPart
+
+REPLY_PREFIX = 'WORKER_REPLY '
+
+def send(reply):
+    """Write one reply line"""
+    # FreeCAD redirects sys.stdout/sys.stdin to its console; use the real pipes
+    sys.__stdout__.write(REPLY_PREFIX + json.dumps(reply) + '\n')
+    sys.__stdout__.flush()
+
+send({'ready': True})
+
+for line in sys.__stdin__:
+    if not line.strip():
+        continue
+    request = {}
+    try:
+        request = json.loads(line)
+        send({'started': request.get('id')})
+        shape = Part.read(request['step'])
+        mesh = MeshPart.meshFromShape(Shape=shape, LinearDeflection=request.get('tolerance', 0.1))
+        try:
+            mesh.write(request['stl'])
+            reply = {'ok': True}
+        except Exception as e:
+            reply = {'ok': False, 'error': str(e), 'write_failed': True}
+    except Exception as e:
+        reply = {'ok': False, 'error': str(e)}
+    reply['id'] = request.get('id')
+    send(reply)
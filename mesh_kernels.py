@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Mesh Kernels
+Compiled per-triangle / per-vertex loops shared by the GLB converters
+
+Numba is optional: when it is not installed, or the mesh is small, the
+same results are computed with vectorized NumPy.
+"""
+
+import functools
+
+import numpy as np
+
+# Below this many faces NumPy is used: importing Numba and loading/compiling
+# the kernels costs more than a small mesh takes to process
+JIT_MIN_FACES = 100_000
+
+@functools.lru_cache(maxsize=1)
+def _jit_kernels():
+    """Numba kernels by name, compiled (or loaded from cache) on first use; None without Numba"""
+    try:
+        import numba
+        from numba import njit, prange
+    except ImportError:
+        return None
+    # The TBB layer hangs interpreter exit when first used off the main
+    # thread (the FreeCAD CLI converter runs on one); prefer the others
+    numba.config.THREADING_LAYER_PRIORITY = ['omp', 'workqueue', 'tbb']
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _face_cross_jit(vertices, faces):
+        """(b - a) x (c - a) for every triangle"""
+        cross = np.empty((faces.shape[0], 3), dtype=np.float64)
+        for i in prange(faces.shape[0]):
+            a, b, c = faces[i, 0], faces[i, 1], faces[i, 2]
+            ux = vertices[b, 0] - vertices[a, 0]
+            uy = vertices[b, 1] - vertices[a, 1]
+            uz = vertices[b, 2] - vertices[a, 2]
+            vx = vertices[c, 0] - vertices[a, 0]
+            vy = vertices[c, 1] - vertices[a, 1]
+            vz = vertices[c, 2] - vertices[a, 2]
+            cross[i, 0] = uy * vz - uz * vy
+            cross[i, 1] = uz * vx - ux * vz
+            cross[i, 2] = ux * vy - uy * vx
+        return cross
+
+    @njit(parallel=True, cache=True)
+    def _crease_sum_jit(cross, unit, corner_face, order, starts, cos_limit):
+        """For each corner, sum the faces around its vertex within the crease angle"""
+        acc = np.zeros((corner_face.shape[0], 3), dtype=np.float64)
+        for v in prange(starts.shape[0] - 1):
+            for a in range(starts[v], starts[v + 1]):
+                i = order[a]
+                fi = corner_face[i]
+                for b in range(starts[v], starts[v + 1]):
+                    fj = corner_face[order[b]]
+                    if (unit[fi, 0] * unit[fj, 0] + unit[fi, 1] * unit[fj, 1]
+                            + unit[fi, 2] * unit[fj, 2]) >= cos_limit:
+                        acc[i, 0] += cross[fj, 0]
+                        acc[i, 1] += cross[fj, 1]
+                        acc[i, 2] += cross[fj, 2]
+        return acc
+
+    @njit(parallel=True, cache=True)
+    def _crease_leader_jit(normals, order, starts):
+        """First corner of the same vertex with a bit-identical normal"""
+        leader = np.empty(normals.shape[0], dtype=np.int64)
+        for v in prange(starts.shape[0] - 1):
+            for a in range(starts[v], starts[v + 1]):
+                i = order[a]
+                leader[i] = i
+                for b in range(starts[v], a):
+                    j = order[b]
+                    if (normals[j, 0] == normals[i, 0] and normals[j, 1] == normals[i, 1]
+                            and normals[j, 2] == normals[i, 2]):
+                        leader[i] = leader[j]
+                        break
+        return leader
+    
+    return {'face_cross': _face_cross_jit, 'crease_sum': _crease_sum_jit,
+            'crease_leader': _crease_leader_jit}
+
+def _kernels_for(faces):
+    """The Numba kernels if this mesh is big enough to be worth them, else None"""
+    return _jit_kernels() if len(faces) >= JIT_MIN_FACES else None
+
+def face_cross(vertices, faces):
+    """Unnormalized face normals; length is twice the triangle area"""
+    jit = _kernels_for(faces)
+    if jit:
+        return jit['face_cross'](vertices, faces)
+    tris = vertices[faces].astype(np.float64)
+    return np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+
+# Corner pairs compared per NumPy batch (bounds the fallback's memory)
+CREASE_PAIRS_PER_BATCH = 1 << 20
+
+def _crease_sum_numpy(cross, unit, corner_vertex, corner_face, cos_limit):
+    """NumPy version of _crease_sum_jit"""
+    # Corners of one vertex whose faces point the same way (e.g. a flat
+    # fan-triangulated cap) form one cluster, so pairs are per cluster
+    keys = np.empty((len(corner_vertex), 4), dtype=np.uint32)
+    keys[:, 0] = corner_vertex
+    keys[:, 1:] = (np.round(unit[corner_face], 6).astype(np.float32) + np.float32(0.0)).view(np.uint32)
+    _, first, cluster = np.unique(keys.view(np.dtype((np.void, 16))).ravel(),
+                                  return_index=True, return_inverse=True)
+    cluster = cluster.ravel()
+    cluster_vertex = corner_vertex[first]
+    cluster_unit = unit[corner_face[first]]
+    cluster_cross = np.column_stack([
+        np.bincount(cluster, weights=cross[corner_face, k], minlength=len(first))
+        for k in range(3)
+    ])
+    
+    # Clusters of one vertex are contiguous after the sort
+    new_vertex = np.concatenate(([True], cluster_vertex[1:] != cluster_vertex[:-1]))
+    group_start = np.flatnonzero(new_vertex)
+    group = np.cumsum(new_vertex) - 1
+    row_start = group_start[group]
+    size = np.diff(np.append(group_start, len(first)))[group]
+    
+    # Every (cluster, cluster of the same vertex) pair, a bounded batch at a time
+    pairs = np.cumsum(size)
+    bounds = np.unique(np.concatenate((
+        [0], np.searchsorted(pairs, np.arange(CREASE_PAIRS_PER_BATCH, pairs[-1], CREASE_PAIRS_PER_BATCH)),
+        [len(first)])))
+    acc = np.zeros((len(first), 3), dtype=np.float64)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        repeats = size[lo:hi]
+        a = np.repeat(np.arange(lo, hi), repeats)
+        b = row_start[a] + np.arange(len(a)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        keep = np.einsum('ij,ij->i', cluster_unit[a], cluster_unit[b]) >= cos_limit
+        for k in range(3):
+            acc[lo:hi, k] = np.bincount(a[keep] - lo, weights=cluster_cross[b[keep], k], minlength=hi - lo)
+    return acc[cluster]
+
+def crease_normals(vertices, faces, crease_angle=30.0):
+    """
+    Vertex normals that stay smooth across shallow edges but break at sharp
+    ones (degrees), so welded CAD meshes keep flat faces. Vertices are
+    duplicated where a crease separates their faces.
+    Returns (vertices, faces, normals) as float32/uint32/float32.
+    """
+    vertices = np.ascontiguousarray(vertices)
+    faces = np.ascontiguousarray(faces)
+    jit = _kernels_for(faces)
+    cross = face_cross(vertices, faces)
+    length = np.linalg.norm(cross, axis=1, keepdims=True)
+    unit = np.divide(cross, length, out=np.zeros_like(cross), where=length > 0)
+    cos_limit = np.cos(np.radians(crease_angle))
+    
+    # Corners grouped by vertex
+    corner_vertex = faces.ravel().astype(np.int64)
+    corner_face = np.arange(len(corner_vertex)) // 3
+    order = np.argsort(corner_vertex, kind='stable')
+    degree = np.bincount(corner_vertex, minlength=len(vertices))
+    starts = np.concatenate(([0], np.cumsum(degree)))
+    
+    if jit:
+        acc = jit['crease_sum'](cross, unit, corner_face, order, starts, cos_limit)
+    else:
+        acc = _crease_sum_numpy(cross, unit, corner_vertex, corner_face, cos_limit)
+    
+    length = np.linalg.norm(acc, axis=1, keepdims=True)
+    np.divide(acc, length, out=acc, where=length > 0)
+    corner_normals = acc.astype(np.float32)
+    
+    # Corners of one vertex that ended up with the same normal share a vertex again
+    if jit:
+        leader = jit['crease_leader'](corner_normals, order, starts)
+    else:
+        keys = np.empty((len(corner_vertex), 4), dtype=np.uint32)
+        keys[:, 0] = corner_vertex
+        keys[:, 1:] = (corner_normals + np.float32(0.0)).view(np.uint32)
+        _, first, inverse = np.unique(keys.view(np.dtype((np.void, 16))).ravel(),
+                                      return_index=True, return_inverse=True)
+        leader = first[inverse.ravel()]
+    
+    is_leader = leader == np.arange(len(leader))
+    new_index = np.cumsum(is_leader) - 1
+    return (np.asarray(vertices, dtype=np.float32)[corner_vertex[is_leader]],
+            new_index[leader].reshape(-1, 3).astype(np.uint32), corner_normals[is_leader])
+
+def weld_vertices(corners):
+    """
+    Merge bit-identical corners of an unindexed triangle soup (e.g. STL)
+    into shared vertices. Returns (vertices, faces) as float32/uint32.
+    """
+    # One contiguous copy; adding 0.0 also folds -0.0 into 0.0 so the
+    # byte-wise comparisons below see them as the same coordinate
+    corners = np.add(corners, np.float32(0.0), dtype=np.float32)
+    count = len(corners)
+
+    try:
+        import meshoptimizer
+    except ImportError:
+        meshoptimizer = None
+
+    if meshoptimizer is not None:
+        # Hash-table dedupe in C++
+        remap = np.empty(count, dtype=np.uint32)
+        unique = meshoptimizer.generate_vertex_remap(
+            remap, np.arange(count, dtype=np.uint32), count, corners, count, 12)
+        vertices = np.empty((unique, 3), dtype=np.float32)
+        vertices[remap] = corners
+        return vertices, remap.reshape(-1, 3)
+
+    # Sort-based fallback on 12-byte keys (much cheaper than unique(axis=0))
+    keys = corners.view(np.dtype((np.void, 12))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return corners[first], inverse.reshape(-1, 3).astype(np.uint32)
+
+def simplify_mesh(vertices, faces, ratio, target_error=1e-2):
+    """
+    Quadric-error decimation (meshoptimizer) down to about ratio * faces.
+    The vertex buffer is unchanged; only the returned faces are reduced.
+    """
+    import meshoptimizer
+
+    indices = np.ascontiguousarray(faces, dtype=np.uint32).ravel()
+    target = max(3, int(len(indices) * ratio) // 3 * 3)
+    simplified = np.empty_like(indices)
+    count = meshoptimizer.simplify(
+        simplified, indices, np.ascontiguousarray(vertices, dtype=np.float32),
+        len(indices), len(vertices), 12, target, target_error)
+    return simplified[:count].reshape(-1, 3)
+
+def optimize_vertex_order(vertices, faces, normals=None):
+    """
+    Reorder triangles for the GPU post-transform cache, then vertices in
+    first-use order for fetch locality. Needs meshoptimizer; without it
+    the mesh is returned unchanged.
+    """
+    try:
+        import meshoptimizer
+    except ImportError:
+        return vertices, faces, normals
+
+    indices = np.ascontiguousarray(faces, dtype=np.uint32).ravel()
+    optimized = np.empty_like(indices)
+    meshoptimizer.optimize_vertex_cache(optimized, indices, len(indices), len(vertices))
+
+    # remap[old] = new, ~0 for vertices no triangle uses
+    remap = np.empty(len(vertices), dtype=np.uint32)
+    count = meshoptimizer.optimize_vertex_fetch_remap(remap, optimized, len(optimized), len(vertices))
+    used = np.nonzero(remap != np.uint32(0xFFFFFFFF))[0]
+    order = np.empty(count, dtype=np.int64)
+    order[remap[used]] = used
+
+    if normals is not None:
+        normals = normals[order]
+    return vertices[order], remap[optimized].reshape(-1, 3), normals
@@ -3,219 +3,601 @@
 Direct STEP to GLB Converter
 Converts STEP files directly to GLB format for the 3D CAD Viewer
 
-Usage: python step_to_glb_converter.py input.step output.glb
+Usage: python step_to_glb_converter.py input.step output.glb [--decimate RATIO]
 """
 
 import sys
 import os
+import json
+import atexit
+import logging
+import functools
 import tempfile
+import threading
 
-def convert_step_to_glb_freecad(step_file, glb_file):
+# Converters run in several processes at once; log through one buffered
+# stdout stream instead of a print() syscall per line. A terminal gets line
+# buffering so progress shows up while a long conversion is still running.
+log = logging.getLogger(__name__)
+try:
+    _log_stream = open(sys.stdout.fileno(), 'w', buffering=1 if sys.stdout.isatty() else 65536,
+                       closefd=False, encoding=sys.stdout.encoding or 'utf-8', errors='replace')
+except (AttributeError, OSError, ValueError):
+    _log_stream = sys.stdout  # stdout is not a real file (e.g. captured)
+_log_handler = logging.StreamHandler(_log_stream)
+log.addHandler(_log_handler)
+log.setLevel(logging.INFO)
+log.propagate = False
+
+# Scratch files go to tmpfs when available so they never hit the disk
+# (it can be small, e.g. 64 MB in Docker: see _scratch_dirs)
+SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+# Converted GLBs, keyed by a hash of the STEP file contents and settings
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'step_glb')
+CACHE_FORMAT_VERSION = 1  # bump whenever the GLB output changes
+
+# Linear deflection (model units, mm) used when tessellating B-Rep shapes
+TESSELLATION_TOLERANCE = 0.1
+
+def _stack_tessellation(parts):
+    """Stack (points, triangles) tessellations into float32/uint32 arrays"""
+    import numpy as np
+    
+    vertices, faces = [], []
+    offset = 0
+    for points, triangles in parts:
+        if not len(points) or not len(triangles):
+            continue
+        # FreeCAD/CadQuery vectors expose x, y, z attributes
+        if not isinstance(points, np.ndarray):
+            points = [(p.x, p.y, p.z) for p in points]
+        vertices.append(np.asarray(points, dtype=np.float32))
+        faces.append(np.asarray(triangles, dtype=np.uint32) + offset)
+        offset += len(points)
+    
+    if not vertices:
+        raise ValueError("STEP file produced no triangles")
+    
+    return np.concatenate(vertices), np.concatenate(faces)
+
+def _tessellate_ocp(shape, tolerance=TESSELLATION_TOLERANCE, angular_tolerance=0.5):
+    """Mesh an OCP shape with OCCT's parallel mesher and collect per-face triangles"""
+    import numpy as np
+    from OCP.BRep import BRep_Tool
+    from OCP.BRepMesh import BRepMesh_IncrementalMesh
+    from OCP.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+    from OCP.TopExp import TopExp_Explorer
+    from OCP.TopLoc import TopLoc_Location
+    from OCP.TopoDS import TopoDS
+    
+    # isInParallel=True: OCCT meshes the faces concurrently on its thread pool
+    BRepMesh_IncrementalMesh(shape, tolerance, False, angular_tolerance, True)
+    
+    parts = []
+    explorer = TopExp_Explorer(shape, TopAbs_FACE)
+    while explorer.More():
+        face = TopoDS.Face_s(explorer.Current())
+        loc = TopLoc_Location()
+        tri = BRep_Tool.Triangulation_s(face, loc)
+        if tri is not None:
+            trsf = loc.Transformation()
+            nodes = [tri.Node(i).Transformed(trsf) for i in range(1, tri.NbNodes() + 1)]
+            points = np.array([(p.X(), p.Y(), p.Z()) for p in nodes])
+            triangles = [tri.Triangle(i) for i in range(1, tri.NbTriangles() + 1)]
+            triangles = np.array([(t.Value(1), t.Value(2), t.Value(3)) for t in triangles]) - 1
+            if face.Orientation() == TopAbs_REVERSED:
+                triangles = triangles[:, [0, 2, 1]]
+            parts.append((points, triangles))
+        explorer.Next()
+    
+    return _stack_tessellation(parts)
+
+# Where FreeCAD's Python modules live when it is not on sys.path already
+FREECAD_PATHS = [
+    '/Applications/FreeCAD.app/Contents/Resources/lib',  # macOS
+    '/usr/lib/freecad/lib',  # Linux
+    '/usr/lib/freecad-python3/lib',  # Linux alternative
+    'C:\\Program Files\\FreeCAD\\bin',  # Windows
+]
+
+@functools.lru_cache(maxsize=1)
+def _ensure_freecad_on_path():
+    """Add the FreeCAD library dirs to sys.path (checked once per process)"""
+    for path in FREECAD_PATHS:
+        if os.path.exists(path) and path not in sys.path:
+            sys.path.append(path)
+
+def convert_step_to_glb_freecad(step_file, glb_file, decimate=None):
     """Convert STEP to GLB using FreeCAD"""
     try:
-        print("🔄 Attempting conversion with FreeCAD...")
+        log.info("🔄 Attempting conversion with FreeCAD...")
         
         # Try to import FreeCAD
-        freecad_paths = [
-            '/Applications/FreeCAD.app/Contents/Resources/lib',  # macOS
-            '/usr/lib/freecad/lib',  # Linux
-            '/usr/lib/freecad-python3/lib',  # Linux alternative
-            'C:\\Program Files\\FreeCAD\\bin',  # Windows
-        ]
-        
-        for path in freecad_paths:
-            if os.path.exists(path) and path not in sys.path:
-                sys.path.append(path)
+        _ensure_freecad_on_path()
         
         import FreeCAD
-        import Import
-        import Mesh
-        
-        print("✅ FreeCAD found!")
+        import Part
+        from mesh_kernels import crease_normals
+        from stl_to_glb_converter import write_glb
         
-        # Create temporary STL file
-        temp_stl = tempfile.NamedTemporaryFile(suffix='.stl', delete=False)
-        stl_path = temp_stl.name
-        temp_stl.close()
+        log.info("✅ FreeCAD found!")
         
-        print(f"📂 Loading STEP file: {step_file}")
+        log.info(f"📂 Loading STEP file: {step_file}")
         
-        # Import STEP file
-        Import.insert(step_file, "TempDoc")
-        doc = FreeCAD.ActiveDocument
+        # Plain STEPControl_Reader: no document, names, colors or assembly tree
+        shape = Part.read(step_file)
         
-        if not doc:
-            doc = FreeCAD.newDocument("TempDoc")
-            Import.insert(step_file, "TempDoc")
+        # Tessellate in memory - no STL round-trip through the filesystem
+        log.info("💾 Converting to mesh format...")
+        vertices, faces = _stack_tessellation([shape.tessellate(TESSELLATION_TOLERANCE)])
         
-        # Export to STL
-        print("💾 Converting to mesh format...")
-        objs = [obj for obj in doc.Objects]
-        Mesh.export(objs, stl_path)
+        log.info("🔄 Converting to GLB format...")
+        vertices, faces, normals = crease_normals(vertices, faces)
+        write_glb(vertices, faces, glb_file, normals, decimate)
         
-        # Now convert STL to GLB using trimesh
-        print("🔄 Converting to GLB format...")
-        import trimesh
-        mesh_data = trimesh.load(stl_path)
-        mesh_data.export(glb_file, file_type='glb')
-        
-        # Clean up
-        try:
-            os.remove(stl_path)
-            FreeCAD.closeDocument("TempDoc")
-        except:
-            pass
-        
-        print(f"✅ SUCCESS! GLB file created: {glb_file}")
+        log.info(f"✅ SUCCESS! GLB file created: {glb_file}")
         return True
         
     except ImportError as e:
-        print(f"❌ FreeCAD not found: {e}")
+        log.info(f"❌ FreeCAD not found: {e}")
         return False
     except Exception as e:
-        print(f"❌ Conversion failed: {e}")
+        log.info(f"❌ Conversion failed: {e}")
         return False
 
-def convert_step_to_glb_cadquery(step_file, glb_file):
+def convert_step_to_glb_cadquery(step_file, glb_file, decimate=None):
     """Convert STEP to GLB using CadQuery"""
     try:
-        print("🔄 Attempting conversion with CadQuery...")
+        log.info("🔄 Attempting conversion with CadQuery...")
         import cadquery as cq
-        import trimesh
-        
-        print("✅ CadQuery found!")
+        from mesh_kernels import crease_normals
+        from stl_to_glb_converter import write_glb
         
-        # Create temporary STL file
-        temp_stl = tempfile.NamedTemporaryFile(suffix='.stl', delete=False)
-        stl_path = temp_stl.name
-        temp_stl.close()
+        log.info("✅ CadQuery found!")
         
-        print(f"📂 Loading STEP file: {step_file}")
+        log.info(f"📂 Loading STEP file: {step_file}")
         
-        # Import STEP and export to STL
+        # Import STEP and tessellate in memory, faces meshed in parallel
         result = cq.importers.importStep(step_file)
-        result.val().exportStl(stl_path)
-        
-        # Convert STL to GLB
-        print("🔄 Converting to GLB format...")
-        mesh_data = trimesh.load(stl_path)
-        mesh_data.export(glb_file, file_type='glb')
+        vertices, faces = _tessellate_ocp(result.val().wrapped)
         
-        # Clean up
-        try:
-            os.remove(stl_path)
-        except:
-            pass
+        # Build GLB directly from the triangle arrays
+        log.info("🔄 Converting to GLB format...")
+        vertices, faces, normals = crease_normals(vertices, faces)
+        write_glb(vertices, faces, glb_file, normals, decimate)
         
-        print(f"✅ SUCCESS! GLB file created: {glb_file}")
+        log.info(f"✅ SUCCESS! GLB file created: {glb_file}")
         return True
         
     except ImportError:
-        print("❌ CadQuery not found")
+        log.info("❌ CadQuery not found")
         return False
     except Exception as e:
-        print(f"❌ Conversion failed: {e}")
+        log.info(f"❌ Conversion failed: {e}")
         return False
 
-def convert_step_to_glb_cli(step_file, glb_file):
-    """Convert STEP to GLB using FreeCAD command line"""
-    try:
-        print("🔄 Attempting conversion with FreeCAD CLI...")
-        import subprocess
-        import trimesh
+# FreeCAD command-line executables, in order of preference
+FREECAD_COMMANDS = [
+    'freecadcmd',
+    'FreeCADCmd',
+    '/Applications/FreeCAD.app/Contents/MacOS/FreeCAD',
+    'freecad',
+]
+
+# Headless FreeCAD worker (freecad_worker.py) reused for every conversion
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'freecad_worker.py')
+WORKER_REPLY = 'WORKER_REPLY '
+WORKER_TIMEOUT = 120  # 2 minute timeout for large files
+_worker_store = {'worker': None, 'broken': set()}
+_worker_lock = threading.Lock()
+
+def _freecad_worker():
+    """
+    Return the running FreeCAD worker, starting it on first use.
+    A worker is a dict: proc, pending ({request id: reply queue}), ids, cmd.
+    """
+    import itertools
+    import subprocess
+    
+    with _worker_lock:
+        worker = _worker_store['worker']
+        if worker and not worker['dead']:
+            return worker
+        
+        # Skip commands whose worker exited before it was ready
+        for cmd in FREECAD_COMMANDS:
+            if cmd in _worker_store['broken']:
+                continue
+            try:
+                proc = subprocess.Popen(
+                    [cmd, WORKER_SCRIPT],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True
+                )
+            except OSError:
+                continue
+            
+            worker = {'proc': proc, 'cmd': cmd, 'pending': {}, 'ids': itertools.count(1),
+                      'ready': False, 'killed': False, 'dead': False}
+            threading.Thread(target=_read_worker_replies, args=(worker,), daemon=True).start()
+            _worker_store['worker'] = worker
+            return worker
+    
+    return None
+
+def _read_worker_replies(worker):
+    """Hand each reply to the request with the same id; wake everyone on exit"""
+    # FreeCAD prints its own banner/messages too: keep only worker replies
+    for line in worker['proc'].stdout:
+        if line.startswith(WORKER_REPLY):
+            reply = json.loads(line[len(WORKER_REPLY):])
+            with _worker_lock:
+                if reply.get('ready'):
+                    worker['ready'] = True
+                    continue
+                if 'started' in reply:
+                    # Worker picked the request up; the final reply follows
+                    replies = worker['pending'].get(reply['started'])
+                else:
+                    replies = worker['pending'].pop(reply.get('id'), None)
+            if replies:
+                replies.put(reply)
+    
+    with _worker_lock:
+        if not worker['ready'] and not worker['killed']:
+            _worker_store['broken'].add(worker['cmd'])  # try the next command
+        _retire_worker(worker)
+        pending, worker['pending'] = worker['pending'], {}
+    for replies in pending.values():
+        replies.put(None)  # worker exited
+
+def _retire_worker(worker):
+    """Stop handing out this worker (caller holds _worker_lock)"""
+    worker['dead'] = True
+    if _worker_store['worker'] is worker:
+        _worker_store['worker'] = None
+
+def _kill_worker(worker, request_id):
+    """Kill a worker because of one of its requests (timeout or cancel)"""
+    with _worker_lock:
+        worker['pending'].pop(request_id, None)
+        worker['killed'] = True
+        _retire_worker(worker)
+    worker['proc'].kill()
+
+def _worker_request(request, cancel=None):
+    """
+    Send one request to the FreeCAD worker and wait for its reply (None on
+    failure). Setting the cancel event kills the worker if it is still busy.
+    """
+    import queue
+    import time
+    
+    # A command whose worker dies before it is ready is skipped for the next
+    # one; a ready worker that dies under us (crash, or killed after another
+    # request's timeout) is replaced once
+    crashes = 0
+    while crashes < 2:
+        worker = _freecad_worker()
+        if worker is None:
+            return None
         
-        # Create temporary STL file
-        temp_stl = tempfile.NamedTemporaryFile(suffix='.stl', delete=False)
-        stl_path = temp_stl.name
-        temp_stl.close()
+        replies = queue.Queue()
+        with _worker_lock:
+            if worker['dead']:
+                continue
+            request_id = next(worker['ids'])
+            worker['pending'][request_id] = replies
+            try:
+                worker['proc'].stdin.write(json.dumps(dict(request, id=request_id)) + '\n')
+                worker['proc'].stdin.flush()
+            except (OSError, ValueError):
+                worker['pending'].pop(request_id, None)
+                _retire_worker(worker)
+                crashes += worker['ready']
+                continue
         
-        # Create conversion script
-        conversion_script = f"""
-import FreeCAD
-import Import
-import Mesh
-
-Import.insert("{step_file}", "TempDoc")
-doc = FreeCAD.ActiveDocument
-if doc:
-    objs = [obj for obj in doc.Objects]
-    Mesh.export(objs, "{stl_path}")
-    FreeCAD.closeDocument("TempDoc")
-"""
+        # The timeout runs from when the worker starts this request, not from
+        # when it was queued behind others
+        deadline = None
+        while True:
+            if cancel is not None and cancel.is_set():
+                _kill_worker(worker, request_id)
+                return None
+            try:
+                reply = replies.get(timeout=0.5)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() > deadline:
+                    log.info(f"⏱️ Timeout after {WORKER_TIMEOUT}s, restarting FreeCAD worker")
+                    _kill_worker(worker, request_id)
+                    return None
+                continue
+            if reply is not None and 'started' in reply:
+                deadline = time.monotonic() + WORKER_TIMEOUT
+                continue
+            break
         
-        script_file = tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False)
-        script_path = script_file.name
-        script_file.write(conversion_script)
-        script_file.close()
+        if reply is not None:
+            return reply
+        if worker['ready']:
+            crashes += 1
+    
+    return None
+
+def _stop_freecad_worker():
+    """Close the worker's stdin so it exits; kill it if it is still busy"""
+    worker = _worker_store['worker']
+    if worker and worker['proc'].poll() is None:
+        proc = worker['proc']
+        if worker['pending']:
+            proc.kill()  # nobody is waiting for that result any more
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+
+atexit.register(_stop_freecad_worker)
+
+def _scratch_dirs(step_file):
+    """Where to put a STEP's intermediate STL: tmpfs if it has room, then disk"""
+    import shutil
+    
+    disk = tempfile.gettempdir()
+    if SCRATCH_DIR == disk:
+        return [disk]
+    try:
+        # A tessellated STL is typically several times larger than its STEP
+        if shutil.disk_usage(SCRATCH_DIR).free < 4 * os.path.getsize(step_file):
+            return [disk]
+    except OSError:
+        return [disk]
+    return [SCRATCH_DIR, disk]
+
+def convert_step_to_glb_cli(step_file, glb_file, decimate=None, cancel=None):
+    """
+    Convert STEP to GLB using a persistent FreeCAD command line worker.
+    Setting the cancel event (another converter won) abandons the request.
+    """
+    try:
+        log.info("🔄 Attempting conversion with FreeCAD CLI...")
+        from mesh_kernels import crease_normals
+        from stl_to_glb_converter import read_stl, write_glb
         
-        print(f"📂 Loading STEP file: {step_file}")
+        if _freecad_worker() is None:
+            log.info("❌ FreeCAD CLI not found or failed")
+            return False
         
-        # Try different FreeCAD command names
-        freecad_commands = [
-            'freecadcmd',
-            'FreeCADCmd',
-            '/Applications/FreeCAD.app/Contents/MacOS/FreeCAD',
-            'freecad',
-        ]
+        log.info(f"📂 Loading STEP file: {step_file}")
         
         success = False
-        for cmd in freecad_commands:
+        for scratch_dir in _scratch_dirs(step_file):
+            # Create temporary STL file
+            temp_stl = tempfile.NamedTemporaryFile(suffix='.stl', dir=scratch_dir, delete=False)
+            stl_path = temp_stl.name
+            temp_stl.close()
+            
+            reply = None
             try:
-                result = subprocess.run(
-                    [cmd, script_path],
-                    capture_output=True,
-                    timeout=120,  # 2 minute timeout for large files
-                    text=True
-                )
+                reply = _worker_request({'step': os.path.abspath(step_file), 'stl': stl_path,
+                                         'tolerance': TESSELLATION_TOLERANCE}, cancel)
                 
-                if result.returncode == 0 and os.path.exists(stl_path) and os.path.getsize(stl_path) > 0:
-                    print("✅ FreeCAD CLI conversion successful!")
-                    
-                    # Convert STL to GLB
-                    print("🔄 Converting to GLB format...")
-                    mesh_data = trimesh.load(stl_path)
-                    mesh_data.export(glb_file, file_type='glb')
+                if cancel is not None and cancel.is_set():
+                    pass  # another converter already won: skip the GLB
+                elif reply and reply.get('ok') and os.path.getsize(stl_path) > 0:
+                    log.info("✅ FreeCAD CLI conversion successful!")
                     
+                    # Convert STL to GLB (STL is memory-mapped, not read)
+                    log.info("🔄 Converting to GLB format...")
+                    vertices, faces = read_stl(stl_path)
+                    vertices, faces, normals = crease_normals(vertices, faces)
+                    write_glb(vertices, faces, glb_file, normals, decimate)
                     success = True
-                    break
-            except FileNotFoundError:
-                continue
-            except subprocess.TimeoutExpired:
-                print(f"⏱️ Timeout with {cmd}")
-                continue
-            except Exception as e:
-                continue
-        
-        # Clean up
-        try:
-            os.remove(stl_path)
-            os.remove(script_path)
-        except:
-            pass
+                elif reply:
+                    log.info(f"❌ FreeCAD CLI failed: {reply.get('error', 'empty mesh')}")
+            except (OSError, ValueError) as e:
+                log.info(f"❌ FreeCAD CLI failed: {e}")
+            
+            # Clean up
+            try:
+                os.remove(stl_path)
+            except:
+                pass
+            
+            # Only an STL that did not fit in tmpfs is worth retrying on disk
+            if success or not (reply and reply.get('write_failed')) or (cancel and cancel.is_set()):
+                break
+            log.info("↪️  Scratch space full, retrying with the STL on disk")
         
         if success:
-            print(f"✅ SUCCESS! GLB file created: {glb_file}")
+            log.info(f"✅ SUCCESS! GLB file created: {glb_file}")
             return True
         else:
-            print("❌ FreeCAD CLI not found or failed")
+            log.info("❌ FreeCAD CLI not found or failed")
             return False
             
     except Exception as e:
-        print(f"❌ Conversion failed: {e}")
+        log.info(f"❌ Conversion failed: {e}")
+        return False
+
+def _available_converters():
+    """Probe which backends are installed without importing them"""
+    import importlib.util
+    import shutil
+    
+    _ensure_freecad_on_path()
+    found = []
+    has_freecad = importlib.util.find_spec('FreeCAD') is not None
+    if has_freecad:
+        found.append(convert_step_to_glb_freecad)
+    if importlib.util.find_spec('cadquery'):
+        found.append(convert_step_to_glb_cadquery)
+    # The CLI runs the same OCCT reader/mesher plus an STL round-trip: only
+    # worth it when the FreeCAD module cannot be imported here
+    if not has_freecad and any(shutil.which(cmd) for cmd in FREECAD_COMMANDS):
+        found.append(convert_step_to_glb_cli)
+    return found
+
+# Converters launched concurrently for every STEP file (only those installed)
+CONVERTERS = _available_converters()
+
+# Converters that only drive a subprocess run on a thread in this process,
+# so the FreeCAD worker they start survives from one conversion to the next
+THREADED_CONVERTERS = {convert_step_to_glb_cli}
+
+def _run_converter(job, **options):
+    """Run one converter into its own output file"""
+    converter, step_file, out_file, decimate = job
+    try:
+        return out_file, converter(step_file, out_file, decimate, **options)
+    finally:
+        # Workers are terminated, not shut down: flush before returning
+        _log_handler.flush()
+
+def _run_converter_process(job):
+    """Process entry point: the exit code reports success (0) or failure"""
+    _, ok = _run_converter(job)
+    sys.exit(0 if ok else 1)
+
+def _cache_path(step_file, decimate=None):
+    """Cache entry for a STEP file and the current settings (blake3 if installed, else blake2b)"""
+    import mmap
+    try:
+        from blake3 import blake3 as hasher
+    except ImportError:
+        from hashlib import blake2b as hasher
+    
+    # Hash through a memory map so large files are never read into RAM
+    with open(step_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            h = hasher(mm)
+    # Anything that changes the output must change the key
+    h.update(f"v{CACHE_FORMAT_VERSION} tol={TESSELLATION_TOLERANCE!r} decimate={decimate!r}".encode())
+    return os.path.join(CACHE_DIR, f"{h.hexdigest()}.glb")
+
+def convert_step_to_glb(step_file, glb_file, converters=CONVERTERS, decimate=None):
+    """
+    Run all converters concurrently and keep the first GLB that succeeds.
+    
+    With more than one converter, some run in spawned processes, so the
+    calling script must guard its entry point with
+    if __name__ == '__main__': (a single converter runs in this process).
+    """
+    import multiprocessing
+    import queue
+    import shutil
+    
+    try:
+        cache_file = _cache_path(step_file, decimate)
+        if os.path.exists(cache_file):
+            shutil.copyfile(cache_file, glb_file)
+            log.info(f"♻️  Same STEP converted before - using cached GLB: {cache_file}")
+            return True
+    except (OSError, ValueError):
+        cache_file = None  # Cache problems should never stop a conversion
+    
+    if not converters:
         return False
+    
+    # Each converter writes to its own file so they never clobber each other
+    jobs = [(fn, step_file, f"{glb_file}.{i}", decimate) for i, fn in enumerate(converters)]
+    # Nothing to race with a single converter: run it right here
+    inline = jobs[0] if len(jobs) == 1 and jobs[0][0] not in THREADED_CONVERTERS else None
+    spawned = [job for job in jobs if job[0] not in THREADED_CONVERTERS and job is not inline]
+    
+    results = queue.Queue()
+    decided = threading.Event()
+    
+    def run_threaded(job):
+        # Threaded converters stop their subprocess work once a winner is picked
+        out_file, ok = _run_converter(job, cancel=decided)
+        if decided.is_set():
+            # Finished after the winner was picked and the others cleaned up
+            try:
+                os.remove(out_file)
+            except OSError:
+                pass
+        results.put((out_file, ok))
+    
+    def watch_process(process, out_file):
+        # Any non-zero exit - including a crash inside OCCT/FreeCAD - is a failure
+        process.join()
+        results.put((out_file, process.exitcode == 0))
+    
+    success = False
+    # Separate processes: FreeCAD/OCCT import state is per-process. Spawned,
+    # not forked: this process has threads (worker replies, JIT thread pool)
+    # that a fork would copy in an inconsistent state. One process per
+    # converter (not a Pool, which silently replaces a worker that dies).
+    _log_handler.flush()
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    try:
+        for job in jobs:
+            if job is inline:
+                results.put(_run_converter(job))
+            elif job in spawned:
+                process = context.Process(target=_run_converter_process, args=(job,), daemon=True)
+                process.start()
+                processes.append(process)
+                threading.Thread(target=watch_process, args=(process, job[2]), daemon=True).start()
+            else:
+                threading.Thread(target=run_threaded, args=(job,), daemon=True).start()
+        
+        for _ in jobs:
+            out_file, ok = results.get()
+            if ok and os.path.exists(out_file):
+                os.replace(out_file, glb_file)
+                success = True
+                break
+    finally:
+        # Kill the converters that are still running
+        decided.set()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        for _, _, out_file, _ in jobs:
+            try:
+                os.remove(out_file)
+            except OSError:
+                pass
+    
+    if success and cache_file:
+        tmp_file = None
+        try:
+            # Copy under a temporary name first so readers never see a partial file
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            fd, tmp_file = tempfile.mkstemp(suffix='.tmp', dir=CACHE_DIR)
+            os.close(fd)
+            shutil.copyfile(glb_file, tmp_file)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            if tmp_file:
+                try:
+                    os.remove(tmp_file)
+                except OSError:
+                    pass
+    
+    return success
 
 def print_usage():
     """Print usage instructions"""
-    print("""
+    log.info("""
 ╔════════════════════════════════════════════════════════════════╗
 ║           Direct STEP to GLB Converter                         ║
 ╚════════════════════════════════════════════════════════════════╝
 
 Usage:
-    python step_to_glb_converter.py input.step output.glb
+    python step_to_glb_converter.py input.step output.glb [--decimate RATIO]
 
 Example:
     python step_to_glb_converter.py 5X8_COUPLER.STEP 5X8_COUPLER.glb
+    python step_to_glb_converter.py 5X8_COUPLER.STEP 5X8_COUPLER.glb --decimate 0.25
 
 Requirements (install at least one):
 
@@ -227,8 +609,11 @@ Requirements (install at least one):
 2. CadQuery:
    conda install -c conda-forge cadquery
 
-3. Trimesh (Required):
-   pip install trimesh
+3. NumPy (Required):
+   pip install numpy
+
+4. meshoptimizer (Optional, for --decimate):
+   pip install meshoptimizer
 
 After conversion, you can:
    - View the GLB file in the 3D CAD Viewer
@@ -242,70 +627,68 @@ Online Alternative (No Installation):
     """)
 
 def main():
-    if len(sys.argv) != 3:
+    from stl_to_glb_converter import parse_decimate_arg
+    
+    args = sys.argv[1:]
+    try:
+        decimate = parse_decimate_arg(args)
+    except ValueError as e:
+        log.info(f"❌ Error: {e}")
+        sys.exit(1)
+    
+    if len(args) != 2:
         print_usage()
         sys.exit(1)
     
-    step_file = sys.argv[1]
-    glb_file = sys.argv[2]
+    step_file, glb_file = args
     
     # Check if input file exists
     if not os.path.exists(step_file):
-        print(f"❌ Error: Input file not found: {step_file}")
+        log.info(f"❌ Error: Input file not found: {step_file}")
         sys.exit(1)
     
     # Check file extension
     if not step_file.lower().endswith(('.step', '.stp')):
-        print(f"❌ Error: Input file must be .step or .stp format")
+        log.info(f"❌ Error: Input file must be .step or .stp format")
         sys.exit(1)
     
-    print("="*60)
-    print("STEP to GLB Direct Conversion")
-    print("="*60)
-    print(f"Input:  {step_file}")
-    print(f"Output: {glb_file}")
-    print(f"Size:   {os.path.getsize(step_file) / 1024 / 1024:.2f} MB")
-    print("="*60)
-    print()
+    log.info("="*60)
+    log.info("STEP to GLB Direct Conversion")
+    log.info("="*60)
+    log.info(f"Input:  {step_file}")
+    log.info(f"Output: {glb_file}")
+    log.info(f"Size:   {os.path.getsize(step_file) / 1024 / 1024:.2f} MB")
+    if decimate:
+        log.info(f"Decimate: {decimate:.0%} of the faces")
+    log.info("="*60)
+    log.info("")
     
-    # Try different converters
-    success = False
-    
-    # Try FreeCAD Python module first
-    if not success:
-        success = convert_step_to_glb_freecad(step_file, glb_file)
-    
-    # Try CadQuery
-    if not success:
-        success = convert_step_to_glb_cadquery(step_file, glb_file)
-    
-    # Try FreeCAD CLI
-    if not success:
-        success = convert_step_to_glb_cli(step_file, glb_file)
+    # Try all converters at once, first success wins
+    success = convert_step_to_glb(step_file, glb_file, decimate=decimate)
     
     if not success:
-        print("\n" + "="*60)
-        print("❌ CONVERSION FAILED")
-        print("="*60)
-        print("\nNo suitable converter found!")
-        print("\nPlease install one of the following:")
-        print("  1. FreeCAD:  brew install --cask freecad")
-        print("  2. CadQuery: conda install -c conda-forge cadquery")
-        print("\nOr use an online converter:")
-        print("  - https://anyconv.com/step-to-stl-converter/")
-        print()
+        log.info("\n" + "="*60)
+        log.info("❌ CONVERSION FAILED")
+        log.info("="*60)
+        log.info("\nNo suitable converter found!")
+        log.info("\nPlease install one of the following:")
+        log.info("  1. FreeCAD:  brew install --cask freecad")
+        log.info("  2. CadQuery: conda install -c conda-forge cadquery")
+        log.info("\nOr use an online converter:")
+        log.info("  - https://anyconv.com/step-to-stl-converter/")
+        log.info("")
         sys.exit(1)
     
-    print("\n" + "="*60)
-    print("✅ CONVERSION COMPLETE!")
-    print("="*60)
-    print(f"\nGLB file created: {glb_file}")
-    print(f"File size: {os.path.getsize(glb_file) / 1024 / 1024:.2f} MB")
-    print("\nYou can now:")
-    print("  - Upload this GLB to the 3D CAD Viewer")
-    print("  - View in any GLB viewer")
-    print("  - Use in web applications")
-    print()
+    log.info("\n" + "="*60)
+    log.info("✅ CONVERSION COMPLETE!")
+    log.info("="*60)
+    log.info(f"\nGLB file created: {glb_file}")
+    log.info(f"File size: {os.path.getsize(glb_file) / 1024 / 1024:.2f} MB")
+    log.info("\nYou can now:")
+    log.info("  - Upload this GLB to the 3D CAD Viewer")
+    log.info("  - View in any GLB viewer")
+    log.info("  - Use in web applications")
+    log.info("")
 
 if __name__ == "__main__":
     main()
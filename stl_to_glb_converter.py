@@ -8,52 +8,250 @@ Usage: python stl_to_glb_converter.py input.stl output.glb
 
 import sys
 import os
+import json
+import mmap
+import struct
 
-def convert_stl_to_glb(stl_file, glb_file):
-    """Convert STL to GLB using trimesh"""
+# Binary STL record: normal, three vertices, attribute byte count (50 bytes)
+STL_TRIANGLE = [('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attr', '<u2')]
+
+# glTF constants
+GLB_MAGIC = 0x46546C67          # "glTF"
+GLB_CHUNK_JSON = 0x4E4F534A     # "JSON"
+GLB_CHUNK_BIN = 0x004E4942      # "BIN\0"
+GL_BYTE = 5120
+GL_UNSIGNED_SHORT = 5123
+GL_UNSIGNED_INT = 5125
+GL_FLOAT = 5126
+GL_ARRAY_BUFFER = 34962
+GL_ELEMENT_ARRAY_BUFFER = 34963
+
+def read_stl(stl_file):
+    """Read an STL into shared (vertices, faces) float32/uint32 arrays"""
+    import numpy as np
+    
+    with open(stl_file, 'rb') as f:
+        # Map the file instead of reading it: the triangle block is viewed in place
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    count = struct.unpack('<I', buf[80:84])[0] if len(buf) >= 84 else -1
+    if len(buf) == 84 + count * 50:
+        # Binary STL: view the triangle block in place, no per-triangle parsing
+        tris = np.frombuffer(buf, dtype=np.dtype(STL_TRIANGLE), count=count, offset=84)
+        corners = tris['vertices'].reshape(-1, 3)
+    else:
+        # ASCII STL: let trimesh parse it
+        try:
+            import trimesh
+        except ImportError:
+            raise ImportError("ASCII STL files need trimesh", name='trimesh')
+        mesh = trimesh.load(stl_file, file_type='stl', process=False)
+        corners = np.asarray(mesh.triangles, dtype=np.float32).reshape(-1, 3)
+    
+    # STL repeats every shared corner - weld identical coordinates
+    from mesh_kernels import weld_vertices
+    return weld_vertices(corners)
+
+def write_glb(vertices, faces, glb_file, normals=None, decimate=None, quantize=True):
+    """
+    Write an indexed triangle mesh as a single-mesh GLB.
+    
+    Positions are quantized to normalized uint16 inside the bounding box
+    (KHR_mesh_quantization) and normals to normalized int8; the node's
+    translation/scale maps them back to model units. quantize=False keeps
+    exact float32 positions/normals and needs no extension. With decimate,
+    the triangle count is first reduced to about that fraction.
+    """
+    import numpy as np
+    from mesh_kernels import optimize_vertex_order, simplify_mesh
+    
+    vertices = np.asarray(vertices, dtype=np.float32)
+    faces = np.asarray(faces, dtype=np.uint32)
+    if decimate:
+        faces = simplify_mesh(vertices, faces, decimate)
+    
+    # Also drops the vertices that decimation left unused
+    vertices, faces, normals = optimize_vertex_order(vertices, faces, normals)
+    
+    node = {'mesh': 0}
+    if quantize:
+        # Uniform scale keeps quantized normals valid under the node transform
+        bbmin = vertices.min(axis=0)
+        extent = float((vertices.max(axis=0) - bbmin).max()) or 1.0
+        positions = np.zeros((len(vertices), 4), dtype=np.uint16)   # 8-byte stride, 4-byte aligned
+        positions[:, :3] = np.round((vertices - bbmin) / extent * 65535)
+        position_accessor = {'componentType': GL_UNSIGNED_SHORT, 'normalized': True}
+        node.update(translation=bbmin.tolist(), scale=[extent] * 3)
+    else:
+        positions = np.ascontiguousarray(vertices, dtype=np.float32)
+        position_accessor = {'componentType': GL_FLOAT}
+    
+    small = len(vertices) <= 0xFFFF
+    indices = np.ascontiguousarray(faces, dtype=np.uint16 if small else np.uint32).ravel()
+    
+    packed = np.zeros((0, 4), dtype=np.int8)
+    if normals is not None and quantize:
+        packed = np.zeros((len(normals), 4), dtype=np.int8)
+        packed[:, :3] = np.round(np.clip(normals, -1.0, 1.0) * 127)
+        normal_accessor = {'componentType': GL_BYTE, 'normalized': True}
+    elif normals is not None:
+        packed = np.ascontiguousarray(normals, dtype=np.float32)
+        normal_accessor = {'componentType': GL_FLOAT}
+    
+    # BIN chunk layout; every section starts 4-byte aligned
+    positions_offset = 0
+    indices_offset = positions.nbytes
+    normals_offset = indices_offset + indices.nbytes + (-indices.nbytes % 4)
+    bin_length = normals_offset + packed.nbytes
+    
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'CMTI CAD Analyser'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [node],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 0}, 'indices': 1, 'mode': 4}]}],
+        'accessors': [
+            dict(position_accessor, bufferView=0, count=len(vertices), type='VEC3',
+                 min=positions[:, :3].min(axis=0).tolist(), max=positions[:, :3].max(axis=0).tolist()),
+            {'bufferView': 1, 'componentType': GL_UNSIGNED_SHORT if small else GL_UNSIGNED_INT,
+             'count': faces.size, 'type': 'SCALAR'},
+        ],
+        'bufferViews': [
+            {'buffer': 0, 'byteOffset': positions_offset, 'byteLength': positions.nbytes,
+             'byteStride': positions.strides[0], 'target': GL_ARRAY_BUFFER},
+            {'buffer': 0, 'byteOffset': indices_offset, 'byteLength': normals_offset - indices_offset,
+             'target': GL_ELEMENT_ARRAY_BUFFER},
+        ],
+        'buffers': [{'byteLength': bin_length}],
+    }
+    if quantize:
+        gltf['extensionsUsed'] = gltf['extensionsRequired'] = ['KHR_mesh_quantization']
+    
+    if normals is not None:
+        # Precomputed normals save the viewer from recomputing them on load
+        gltf['meshes'][0]['primitives'][0]['attributes']['NORMAL'] = 2
+        gltf['accessors'].append(
+            dict(normal_accessor, bufferView=2, count=len(normals), type='VEC3'))
+        gltf['bufferViews'].append(
+            {'buffer': 0, 'byteOffset': normals_offset, 'byteLength': packed.nbytes,
+             'byteStride': packed.strides[0], 'target': GL_ARRAY_BUFFER})
+    
+    # Chunks must be 4-byte aligned: JSON pads with spaces, BIN with zeros
+    json_chunk = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    
+    # Assemble the whole file in one zero-filled buffer (zeros are the BIN
+    # padding) instead of concatenating bytes objects
+    bin_start = 12 + 8 + len(json_chunk) + 8
+    glb = bytearray(bin_start + bin_length)
+    struct.pack_into('<III', glb, 0, GLB_MAGIC, 2, len(glb))
+    struct.pack_into('<II', glb, 12, len(json_chunk), GLB_CHUNK_JSON)
+    glb[20:20 + len(json_chunk)] = json_chunk
+    struct.pack_into('<II', glb, bin_start - 8, bin_length, GLB_CHUNK_BIN)
+    for offset, array in ((positions_offset, positions), (indices_offset, indices), (normals_offset, packed)):
+        start = bin_start + offset
+        glb[start:start + array.nbytes] = memoryview(array.ravel().view(np.uint8))
+    
+    write_file(glb_file, glb)
+
+def write_file(path, data):
+    """Write a buffer with raw os.write calls (no Python file-object chunking)"""
+    # O_BINARY (Windows only) stops os.write from turning \n into \r\n
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        view = memoryview(data)
+        while view:
+            # os.write may write less than asked (e.g. > 2 GiB on Linux)
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def parse_decimate_arg(args):
+    """
+    Remove '--decimate RATIO' from args and return RATIO (None if absent).
+    Raises ValueError when the ratio is invalid or meshoptimizer is missing.
+    """
+    if '--decimate' not in args:
+        return None
+    
+    i = args.index('--decimate')
+    try:
+        ratio = float(args[i + 1])
+    except (IndexError, ValueError):
+        raise ValueError("--decimate needs a ratio, e.g. --decimate 0.1")
+    del args[i:i + 2]
+    
+    if not 0 < ratio <= 1:
+        raise ValueError("--decimate ratio must be between 0 and 1")
+    try:
+        import meshoptimizer
+    except ImportError:
+        raise ValueError("--decimate needs meshoptimizer: pip install meshoptimizer")
+    return ratio
+
+def convert_stl_to_glb(stl_file, glb_file, decimate=None):
+    """Convert STL to GLB by writing the glTF buffers directly"""
     try:
-        import trimesh
-        
         print(f"📂 Loading STL file: {stl_file}")
-        mesh = trimesh.load(stl_file)
+        vertices, faces = read_stl(stl_file)
+        
+        print(f"   Vertices: {len(vertices):,}")
+        print(f"   Faces: {len(faces):,}")
+        
+        # Smooth normals, split at sharp CAD edges (STL corners are welded)
+        from mesh_kernels import crease_normals
+        vertices, faces, normals = crease_normals(vertices, faces)
         
-        print(f"   Vertices: {len(mesh.vertices):,}")
-        print(f"   Faces: {len(mesh.faces):,}")
+        if decimate:
+            print(f"✂️  Decimating to {decimate:.0%} of the faces")
         
         print(f"💾 Exporting to GLB: {glb_file}")
-        mesh.export(glb_file, file_type='glb')
+        write_glb(vertices, faces, glb_file, normals, decimate)
         
         print("✅ Conversion successful!")
         return True
         
-    except ImportError:
-        print("❌ Error: trimesh not installed")
-        print("Install with: pip install trimesh")
+    except ImportError as e:
+        missing = e.name or 'numpy'
+        print(f"❌ Error: {missing} not installed")
+        print(f"Install with: pip install {missing}")
         return False
     except Exception as e:
         print(f"❌ Conversion failed: {e}")
         return False
 
 def main():
-    if len(sys.argv) != 3:
+    args = sys.argv[1:]
+    try:
+        decimate = parse_decimate_arg(args)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    
+    if len(args) != 2:
         print("""
 ╔════════════════════════════════════════════════════════════════╗
 ║              STL to GLB Converter                              ║
 ╚════════════════════════════════════════════════════════════════╝
 
 Usage:
-    python stl_to_glb_converter.py input.stl output.glb
+    python stl_to_glb_converter.py input.stl output.glb [--decimate RATIO]
 
 Example:
     python stl_to_glb_converter.py model.stl model.glb
+    python stl_to_glb_converter.py model.stl model.glb --decimate 0.1
 
 Requirements:
-    pip install trimesh
+    pip install numpy
+    pip install trimesh        (only needed for ASCII STL files)
+    pip install meshoptimizer  (only needed for --decimate)
         """)
         sys.exit(1)
     
-    stl_file = sys.argv[1]
-    glb_file = sys.argv[2]
+    stl_file, glb_file = args
     
     if not os.path.exists(stl_file):
         print(f"❌ Error: File not found: {stl_file}")
@@ -67,7 +265,7 @@ Requirements:
     print("="*60)
     print()
     
-    if convert_stl_to_glb(stl_file, glb_file):
+    if convert_stl_to_glb(stl_file, glb_file, decimate):
         print("\n" + "="*60)
         print(f"✅ GLB file created: {glb_file}")
         print(f"   Size: {os.path.getsize(glb_file) / 1024 / 1024:.2f} MB")
@@ -0,0 +1,133 @@
+"""
+Round-trip tests for write_glb: write a mesh, decode the GLB by hand and
+compare positions, triangles and normals with the input.
+
+Run with: python -m pytest test_glb_roundtrip.py
+"""
+
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from stl_to_glb_converter import (GL_BYTE, GL_FLOAT, GL_UNSIGNED_INT, GL_UNSIGNED_SHORT,
+                                  GLB_CHUNK_BIN, GLB_CHUNK_JSON, GLB_MAGIC, write_glb)
+
+COMPONENTS = {GL_BYTE: np.int8, GL_UNSIGNED_SHORT: np.uint16,
+              GL_UNSIGNED_INT: np.uint32, GL_FLOAT: np.float32}
+SIZES = {'SCALAR': 1, 'VEC3': 3}
+
+
+def read_glb(path):
+    """Split a GLB into its JSON document and BIN chunk"""
+    data = open(path, 'rb').read()
+    magic, version, length = struct.unpack_from('<III', data, 0)
+    assert (magic, version, length) == (GLB_MAGIC, 2, len(data))
+    json_length, json_type = struct.unpack_from('<II', data, 12)
+    assert json_type == GLB_CHUNK_JSON and json_length % 4 == 0
+    gltf = json.loads(data[20:20 + json_length])
+    bin_length, bin_type = struct.unpack_from('<II', data, 20 + json_length)
+    assert bin_type == GLB_CHUNK_BIN and bin_length % 4 == 0
+    assert 28 + json_length + bin_length == len(data)
+    return gltf, data[28 + json_length:]
+
+
+def read_accessor(gltf, binary, index):
+    """Decode an accessor to float64, honouring byteStride and normalized"""
+    accessor = gltf['accessors'][index]
+    view = gltf['bufferViews'][accessor['bufferView']]
+    dtype = np.dtype(COMPONENTS[accessor['componentType']])
+    size = SIZES[accessor['type']]
+    stride = view.get('byteStride', dtype.itemsize * size)
+    assert stride % 4 == 0 or accessor['type'] == 'SCALAR'
+
+    start = view['byteOffset'] + accessor.get('byteOffset', 0)
+    rows = np.ndarray((accessor['count'], size), dtype=dtype, buffer=binary,
+                      offset=start, strides=(stride, dtype.itemsize))
+    assert start + stride * (accessor['count'] - 1) + dtype.itemsize * size <= view['byteOffset'] + view['byteLength']
+
+    values = rows.astype(np.float64)
+    if accessor.get('normalized'):
+        # glTF: unsigned c / max, signed max(c / max, -1)
+        values = np.maximum(values / np.iinfo(dtype).max, -1.0)
+    return values
+
+
+def decode(path):
+    """Return (gltf, positions in model units, faces, normals or None)"""
+    gltf, binary = read_glb(path)
+    primitive = gltf['meshes'][0]['primitives'][0]
+    node = gltf['nodes'][0]
+
+    positions = read_accessor(gltf, binary, primitive['attributes']['POSITION'])
+    positions = positions * node.get('scale', [1, 1, 1]) + node.get('translation', [0, 0, 0])
+    faces = read_accessor(gltf, binary, primitive['indices']).astype(np.int64).reshape(-1, 3)
+    normals = None
+    if 'NORMAL' in primitive['attributes']:
+        normals = read_accessor(gltf, binary, primitive['attributes']['NORMAL'])
+    return gltf, positions, faces, normals
+
+
+def lattice_mesh(n):
+    """n x n grid of integer points with integer heights, plus unit normals"""
+    x, y = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+    vertices = np.stack([x, y, (x * y) % 3], axis=-1).reshape(-1, 3).astype(np.float32)
+    quad = (np.arange(n - 1)[:, None] * n + np.arange(n - 1)[None, :]).ravel()
+    faces = np.concatenate([np.stack([quad, quad + n, quad + 1], axis=-1),
+                            np.stack([quad + 1, quad + n, quad + n + 1], axis=-1)])
+    normals = np.random.default_rng(0).normal(size=vertices.shape)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return vertices, faces.astype(np.uint32), normals.astype(np.float32)
+
+
+def canonical_triangles(faces):
+    """Rotate each triangle so its smallest index comes first (winding kept), then sort"""
+    shift = faces.argmin(axis=1)
+    rolled = np.stack([faces[np.arange(len(faces)), (shift + k) % 3] for k in range(3)], axis=-1)
+    return rolled[np.lexsort(rolled.T[::-1])]
+
+
+def check_roundtrip(tmp_path, n, quantize, with_normals):
+    vertices, faces, normals = lattice_mesh(n)
+    glb_file = tmp_path / 'mesh.glb'
+    write_glb(vertices, faces, str(glb_file), normals=normals if with_normals else None,
+              quantize=quantize)
+    gltf, positions, decoded_faces, decoded_normals = decode(glb_file)
+
+    # The writer may reorder vertices and triangles; map back through the
+    # lattice coordinates, which stay recoverable after quantization
+    extent = float(vertices.max() - vertices.min())
+    tolerance = extent / 65535 if quantize else 0.0
+    key = np.round(positions).astype(np.int64)
+    assert np.abs(positions - key).max() <= tolerance + 1e-6
+    original = (key[:, 0] * n + key[:, 1])
+    assert np.array_equal(vertices[original, 2], key[:, 2])
+    assert len(np.unique(original)) == len(original) == len(vertices)
+
+    assert np.array_equal(canonical_triangles(original[decoded_faces]), canonical_triangles(faces.astype(np.int64)))
+
+    if with_normals:
+        limit = 1 / 127 if quantize else 1e-7
+        assert np.abs(decoded_normals - normals[original]).max() <= limit
+    else:
+        assert decoded_normals is None
+
+    index_type = gltf['accessors'][gltf['meshes'][0]['primitives'][0]['indices']]['componentType']
+    assert index_type == (GL_UNSIGNED_SHORT if len(vertices) <= 0xFFFF else GL_UNSIGNED_INT)
+    if quantize:
+        assert gltf['extensionsRequired'] == ['KHR_mesh_quantization']
+    else:
+        assert 'extensionsUsed' not in gltf and 'extensionsRequired' not in gltf
+
+
+@pytest.mark.parametrize('quantize', [True, False])
+@pytest.mark.parametrize('with_normals', [True, False])
+def test_small_mesh(tmp_path, quantize, with_normals):
+    check_roundtrip(tmp_path, 12, quantize, with_normals)
+
+
+@pytest.mark.parametrize('quantize', [True, False])
+def test_uint32_indices(tmp_path, quantize):
+    # 300 x 300 = 90000 vertices needs 32-bit indices
+    check_roundtrip(tmp_path, 300, quantize, True)